@@ -0,0 +1,1371 @@
+import sqlite3  # Importamos la librería sqlite3 para gestionar bases de datos
+import numpy as np  # Importamos numpy para operaciones numéricas avanzadas
+import ttkbootstrap as ttk  # Importamos ttkbootstrap para la interfaz gráfica
+from ttkbootstrap.constants import *  # Importamos constantes de ttkbootstrap
+from PIL import Image, ImageTk, ImageDraw, ImageChops  # Importamos PIL para manipulación de imágenes
+import random  # Importamos random para generación de números aleatorios
+import os  # Importamos os para operaciones del sistema operativo
+import noise  # Importamos noise para generar ruido Perlin
+import math  # Importamos math para operaciones matemáticas
+import time  # Importamos time para manipular el tiempo
+import threading  # Importamos threading para renderizar en segundo plano
+
+# Lista global para almacenar los tiempos de inicio y fin
+estadisticas_tiempos = {}
+tiempo_total_refresco = 0
+
+def iniciar_medicion(nombre):
+    estadisticas_tiempos[nombre] = {'inicio': time.time(), 'fin': None}
+
+def terminar_medicion(nombre):
+    estadisticas_tiempos[nombre]['fin'] = time.time()
+
+def mostrar_estadisticas_refresco():
+    global tiempo_total_refresco
+    mediciones = list(estadisticas_tiempos.items())  # Copia, porque el hilo de render también mide
+    tiempo_total_refresco = sum(t['fin'] - t['inicio'] for _, t in mediciones if t['fin'])
+    
+    print("Estadísticas de tiempo (Refresco):")
+    for nombre, tiempos in mediciones:
+        if tiempos['fin']:
+            duracion = tiempos['fin'] - tiempos['inicio']
+            porcentaje = (duracion / tiempo_total_refresco) * 100 if tiempo_total_refresco else 0
+            print(f"{nombre}: {duracion:.4f} segundos ({porcentaje:.2f}%)")
+
+# Crear el directorio de render si no existe
+directorio_salida = "render"  # Definimos el nombre del directorio de salida
+os.makedirs(directorio_salida, exist_ok=True)  # Creamos el directorio si no existe
+
+# Función para interpolar entre dos colores
+def interpolar_color(color1, color2, factor):
+    return tuple(int(a + (b - a) * factor) for a, b in zip(color1, color2))
+
+# Función para interpolar entre dos valores
+def interpolar_valor(val1, val2, factor):
+    return val1 + (val2 - val1) * factor
+
+# Función para oscurecer un color
+def oscurecer_color(color, factor):
+    return tuple(int(c * (1 - factor)) for c in color)
+
+# Variables globales para la hora del día y la luz ambiental
+hora_del_dia = 12.0  # Comenzamos al mediodía
+velocidad_tiempo = 1.0  # Velocidad de progresión del tiempo
+luz_ambiental = 1.0  # Máximo brillo al mediodía
+
+# Función para actualizar la luz ambiental
+def actualizar_luz_ambiental():
+    global luz_ambiental, hora_del_dia
+    # Calcular la luz ambiental basada en la hora del día
+    if 6 <= hora_del_dia <= 18:  # Si es de día
+        luz_ambiental = interpolar_valor(0.5, 1.0, (hora_del_dia - 6) / 12)
+    else:  # Si es de noche
+        if hora_del_dia < 6:  # Temprano en la mañana
+            luz_ambiental = interpolar_valor(0.0, 0.5, hora_del_dia / 6)
+        else:  # Tarde en la noche
+            luz_ambiental = interpolar_valor(1.0, 0.5, (hora_del_dia - 18) / 6)
+    
+    actualizar_lienzo()  # Actualizamos el lienzo
+    raiz.after(int(1000 / velocidad_tiempo), actualizar_hora)  # Programamos la próxima actualización
+
+# Función para actualizar la hora
+def actualizar_hora():
+    global hora_del_dia, velocidad_tiempo
+    hora_del_dia += velocidad_tiempo * 0.1  # Incrementamos la hora del día
+    if hora_del_dia >= 24:  # Si pasa las 24 horas, reiniciamos
+        hora_del_dia -= 24
+    actualizar_luz_ambiental()  # Actualizamos la luz ambiental
+
+# Constante de la proyección isométrica (coseno de 30 grados)
+FACTOR_ISO = math.sqrt(3) / 2
+
+# Parámetros de la geometría que comparten todas las capas
+parametros_geometria = ("multiplicador_altura", "desfase_y_pixel", "separacion_pixeles")
+
+# Parámetros de los que depende cada capa además de la geometría
+# Al mover un deslizador solo se redibujan las capas que lo usan y se vuelve a combinar
+# La luz ambiental no está aquí: se aplica sobre el fotograma ya combinado
+dependencias_capas = {
+    "terreno": (),
+    "sombra": ("factor_sombra",),
+    "agua": ("nivel_agua",),
+    "nubes": ("desfase_nube", "transparencia_nube", "brillo_nube"),
+    "sprites": ("escala_personaje", "direccion_personaje", "npcs"),
+}
+capas_celdas = ("terreno", "sombra", "agua", "nubes")  # Capas que se dibujan celda a celda
+
+# Caché de la vista y de cada capa, para reutilizarlas entre fotogramas
+cache_seccion = {
+    "geometria": None,  # Tamaño de la vista y parámetros de geometría con los que se dibujaron las capas
+    "vista": None,  # (x_inicio, y_inicio) de la vista cacheada
+    "origen": None,  # Origen de la vista sin dar la vuelta al mundo, para que la fase sea continua
+    "fase": None,  # Fase de la proyección isométrica de la vista
+    "datos": None,  # Arrays de alturas, colores y nubes de la vista
+    "capas": {},  # Imagen de cada capa sin combinar
+    "claves": {},  # Valores de las dependencias con los que se dibujó cada capa
+    "fotograma": None,  # Capas combinadas sin luz ambiental
+}
+max_desplazamiento_incremental = 0.25  # Fracción de la sección a partir de la cual se redibuja todo
+
+# Función para construir la condición SQL de un rango que puede dar la vuelta al mundo
+def condicion_rango(columna, inicio, cantidad, total):
+    inicio %= total
+    if inicio + cantidad <= total:
+        return f"{columna} BETWEEN ? AND ?", [inicio, inicio + cantidad - 1]
+    return f"({columna} BETWEEN ? AND ? OR {columna} BETWEEN 0 AND ?)", [inicio, total - 1, inicio + cantidad - 1 - total]
+
+# Función para leer un rectángulo de terreno y nubes en arrays de numpy (fila = y, columna = x)
+# Con paso > 1 solo se leen las celdas cuyas coordenadas del mundo son múltiplo del paso
+def obtener_datos_vista(cursor, x_inicio, y_inicio, ancho_vista, alto_vista, ancho, alto, paso=1):
+    primera_i, primera_j = -x_inicio % paso, -y_inicio % paso
+    columnas_vista, filas_vista = -(-(ancho_vista - primera_i) // paso), -(-(alto_vista - primera_j) // paso)
+    datos = {
+        "alturas": np.full((filas_vista, columnas_vista), np.nan),
+        "colores": np.zeros((filas_vista, columnas_vista, 3), dtype=np.uint8),
+        "nubes": np.full((filas_vista, columnas_vista), np.nan),
+    }
+    condicion_x, parametros_x = condicion_rango("x", x_inicio, ancho_vista, ancho)
+    condicion_y, parametros_y = condicion_rango("y", y_inicio, alto_vista, alto)
+    condicion_paso = f" AND x % {paso} = 0 AND y % {paso} = 0" if paso > 1 else ""
+
+    for tabla, clave in (("terreno", "alturas"), ("nubes", "nubes")):
+        cursor.execute(f"SELECT x, y, color, altura FROM {tabla} WHERE {condicion_x} AND {condicion_y}{condicion_paso}", parametros_x + parametros_y)
+        filas = cursor.fetchall()
+        if not filas:
+            continue
+        xs, ys, colores_str, alturas = zip(*filas)
+        columnas = (np.array(xs) - x_inicio) % ancho // paso
+        filas_vista = (np.array(ys) - y_inicio) % alto // paso
+        datos[clave][filas_vista, columnas] = np.array(alturas) / 65535.0
+        if tabla == "terreno":
+            datos["colores"][filas_vista, columnas] = np.clip(np.array(",".join(colores_str).split(","), dtype=np.int64), 0, 255).astype(np.uint8).reshape(-1, 3)
+
+    return datos
+
+# Función para calcular la fase de la proyección a partir del origen de la vista
+def fase_proyeccion(x_inicio, y_inicio, separacion_pixeles):
+    return (x_inicio - y_inicio) * FACTOR_ISO * separacion_pixeles, (x_inicio + y_inicio) / 2 * separacion_pixeles
+
+# Función para proyectar coordenadas relativas a la vista (escalares o arrays)
+# La fase hace que desplazar la vista una celda desplace la imagen un número entero de píxeles
+def proyectar_iso(i, j, valor, fase, centro_x, centro_y, multiplicador_altura, separacion_pixeles, desfase_y_pixel):
+    base_x, base_y = fase
+    iso_x = np.floor(base_x + (i - j) * FACTOR_ISO * separacion_pixeles) - math.floor(base_x) + centro_x
+    iso_y = np.floor(base_y + ((i + j) / 2 - valor * multiplicador_altura) * separacion_pixeles) - math.floor(base_y) + centro_y - int(multiplicador_altura * separacion_pixeles * 0.65) + desfase_y_pixel
+    return np.asarray(iso_x).astype(int), np.asarray(iso_y).astype(int)
+
+# Función para proyectar los vértices de terreno, agua y nubes de toda la vista
+# Si los datos están submuestreados, cada fila y columna del array avanza parametros["paso"] celdas
+def proyectar_datos(datos, desfase_i, desfase_j, fase, centro_x, centro_y, parametros):
+    alto_vista, ancho_vista = datos["alturas"].shape
+    paso = parametros.get("paso", 1)
+    j, i = np.mgrid[0:alto_vista, 0:ancho_vista]
+    i = i * paso - desfase_i
+    j = j * paso - desfase_j
+    argumentos = (fase, centro_x, centro_y, parametros["multiplicador_altura"], parametros["separacion_pixeles"], parametros["desfase_y_pixel"])
+    iso_x, iso_y_terreno = proyectar_iso(i, j, np.nan_to_num(datos["alturas"]), *argumentos)
+    _, iso_y_agua = proyectar_iso(i, j, parametros["nivel_agua"], *argumentos)
+    _, iso_y_nube = proyectar_iso(i, j, np.nan_to_num(datos["nubes"]) + parametros["desfase_nube"] / parametros["multiplicador_altura"], *argumentos)
+    return {"x": iso_x, "terreno": iso_y_terreno, "agua": iso_y_agua, "nube": iso_y_nube}
+
+# Función para saber qué celdas tienen a sus tres vecinos (derecha, abajo y diagonal)
+def vecinos_completos(presentes):
+    completos = np.zeros_like(presentes)
+    completos[:-1, :-1] = presentes[:-1, :-1] & presentes[:-1, 1:] & presentes[1:, :-1] & presentes[1:, 1:]
+    return completos
+
+# Función para dibujar una selección de celdas en las capas recibidas (terreno, sombra, agua y/o nubes)
+def dibujar_celdas(capas, seleccion, datos, proyeccion, parametros):
+    separacion_pixeles = parametros["separacion_pixeles"] * parametros.get("paso", 1)
+    alturas, nubes = datos["alturas"], datos["nubes"]
+    hay_terreno = ~np.isnan(alturas)
+    hay_nube = ~np.isnan(nubes)
+    completo_terreno = vecinos_completos(hay_terreno)
+    completo_nube = vecinos_completos(hay_nube)
+
+    # Calcular todos los colores de una vez: factor de sombra de las nubes y opacidad de las nubes
+    colores = datos["colores"].astype(int)
+    opacidad_sombra = np.where(hay_nube & (np.nan_to_num(nubes) > 0.5), np.nan_to_num(nubes), 0)
+    factor_sombra = (255 * (1 - parametros["factor_sombra"] * opacidad_sombra)).astype(int)
+    opacidad_nube = np.clip((255 * (np.nan_to_num(nubes) - 0.5) * 2 * parametros["transparencia_nube"] + parametros["brillo_nube"]).astype(int), 0, 255)
+
+    # Pasar a listas de Python para que el acceso dentro del bucle sea rápido
+    px, py_terreno, py_agua, py_nube = (proyeccion[c].tolist() for c in ("x", "terreno", "agua", "nube"))
+    lista_alturas = np.nan_to_num(alturas).tolist()
+    lista_colores, lista_sombra = colores.tolist(), factor_sombra.tolist()
+    lista_opacidad = opacidad_nube.tolist()
+    lista_completo_terreno, lista_completo_nube = completo_terreno.tolist(), completo_nube.tolist()
+
+    dibujar = ImageDraw.Draw(capas["terreno"]) if "terreno" in capas else None
+    dibujar_sombra = ImageDraw.Draw(capas["sombra"]) if "sombra" in capas else None
+    dibujar_agua = ImageDraw.Draw(capas["agua"]) if "agua" in capas else None
+    dibujar_nubes = ImageDraw.Draw(capas["nubes"]) if "nubes" in capas else None
+
+    # Recorrer en el mismo orden que el bucle original (x por fuera, y por dentro)
+    if dibujar or dibujar_sombra or dibujar_agua:
+        columnas, filas = np.nonzero((seleccion & hay_terreno).T)
+        for i, j in zip(columnas.tolist(), filas.tolist()):
+            iso_x = px[j][i]
+            if lista_completo_terreno[j][i]:
+                # Dibujar la baldosa isométrica como un polígono con vértices ajustados por la altura
+                puntos = [(iso_x, py_terreno[j][i]), (px[j][i + 1], py_terreno[j][i + 1]), (px[j + 1][i + 1], py_terreno[j + 1][i + 1]), (px[j + 1][i], py_terreno[j + 1][i])]
+                if dibujar:
+                    dibujar.polygon(puntos, fill=tuple(lista_colores[j][i]), outline="black")
+                if dibujar_sombra:
+                    # La sombra es un factor que multiplica al terreno; los contornos negros no cambian al multiplicarlos
+                    dibujar_sombra.polygon(puntos, fill=lista_sombra[j][i])
+
+                # Superficie del agua con el color del terreno y transparencia
+                if dibujar_agua and lista_alturas[j][i] < parametros["nivel_agua"]:
+                    puntos_agua = [(iso_x, py_agua[j][i]), (px[j][i + 1], py_agua[j][i + 1]), (px[j + 1][i + 1], py_agua[j + 1][i + 1]), (px[j + 1][i], py_agua[j + 1][i])]
+                    color = lista_colores[j][i]
+                    dibujar_agua.polygon(puntos_agua, fill=(color[0], color[1], color[2], 128))
+            else:
+                # Dibujar la baldosa isométrica alineada con el plano xy
+                iso_y = py_terreno[j][i]
+                puntos = [
+                    (iso_x, iso_y),  # Superior
+                    (iso_x + separacion_pixeles * FACTOR_ISO, iso_y + separacion_pixeles / 2),  # Derecha
+                    (iso_x, iso_y + separacion_pixeles),  # Inferior
+                    (iso_x - separacion_pixeles * FACTOR_ISO, iso_y + separacion_pixeles / 2)  # Izquierda
+                ]
+                if dibujar:
+                    dibujar.polygon(puntos, fill=tuple(lista_colores[j][i]), outline="black")
+                if dibujar_sombra:
+                    dibujar_sombra.polygon(puntos, fill=255)
+
+    if dibujar_nubes:
+        columnas, filas = np.nonzero((seleccion & hay_nube & (np.nan_to_num(nubes) > 0.5) & completo_nube).T)
+        for i, j in zip(columnas.tolist(), filas.tolist()):
+            puntos_nube = [(px[j][i], py_nube[j][i]), (px[j][i + 1], py_nube[j][i + 1]), (px[j + 1][i + 1], py_nube[j + 1][i + 1]), (px[j + 1][i], py_nube[j + 1][i])]
+            dibujar_nubes.polygon(puntos_nube, fill=(255, 255, 255, lista_opacidad[j][i]))
+
+# Modo y fondo de cada capa
+fondos_capas = {
+    "terreno": ("RGB", (255, 255, 255)),  # Comenzamos con un fondo blanco
+    "sombra": ("L", 255),  # Sin sombra el factor es 1
+    "agua": ("RGBA", (0, 0, 0, 0)),
+    "nubes": ("RGBA", (0, 0, 0, 0)),
+    "sprites": ("RGBA", (0, 0, 0, 0)),
+}
+
+# Función para crear las capas vacías de una sección
+def crear_capas(ancho_iso, alto_iso, nombres):
+    return {nombre: Image.new(fondos_capas[nombre][0], (ancho_iso, alto_iso), fondos_capas[nombre][1]) for nombre in nombres}
+
+# Función para combinar el terreno sombreado, la superficie del agua, la capa de nubes y los sprites
+def combinar_capas(capas):
+    sombra = capas["sombra"]
+    seccion = ImageChops.multiply(capas["terreno"], Image.merge("RGB", (sombra, sombra, sombra))).convert("RGBA")
+    seccion = Image.alpha_composite(seccion, capas["agua"])
+    seccion = Image.alpha_composite(seccion, capas["nubes"])
+    seccion = Image.alpha_composite(seccion, capas["sprites"])
+    return seccion.convert("RGB")
+
+# Función para aplicar la luz ambiental al fotograma combinado con una tabla de consulta
+def iluminar_fotograma(fotograma, luz_ambiental):
+    if luz_ambiental >= 1.0:
+        return fotograma
+    tabla = [int(valor * luz_ambiental) for valor in range(256)]
+    return fotograma.point(tabla * 3)
+
+# Función para generar una sección en perspectiva isométrica
+def generar_seccion_isometrica(x_inicio, x_fin, y_inicio, y_fin, ancho, alto, escala, semilla, nivel_agua, multiplicador_altura, cursor, desfase_y_pixel, separacion_pixeles, desfase_nube, factor_sombra, transparencia_nube, brillo_nube, npcs, escala_personaje, direccion_personaje, paso=1, luz_ambiental=1.0):
+    random.seed(semilla)  # Fijamos la semilla aleatoria
+
+    ancho_iso, alto_iso = (x_fin - x_inicio) * separacion_pixeles, (y_fin - y_inicio) * separacion_pixeles
+    centro_x, centro_y = ancho_iso // 2, alto_iso // 2
+    parametros = {
+        "nivel_agua": nivel_agua, "multiplicador_altura": multiplicador_altura, "desfase_y_pixel": desfase_y_pixel,
+        "separacion_pixeles": separacion_pixeles, "desfase_nube": desfase_nube, "factor_sombra": factor_sombra,
+        "transparencia_nube": transparencia_nube, "brillo_nube": brillo_nube,
+        "escala_personaje": escala_personaje, "direccion_personaje": direccion_personaje, "npcs": tuple(npcs), "luz_ambiental": luz_ambiental,
+    }
+
+    # Vista previa rápida: no toca la caché de capas, que sigue sirviendo para el refinado
+    if paso > 1:
+        return generar_vista_previa(x_inicio, y_inicio, x_fin - x_inicio, y_fin - y_inicio, ancho, alto, cursor, dict(parametros, paso=paso), npcs)
+
+    geometria = (x_fin - x_inicio, y_fin - y_inicio) + tuple(parametros[p] for p in parametros_geometria)
+    claves = {nombre: tuple(parametros[p] for p in dependencias) for nombre, dependencias in dependencias_capas.items()}
+
+    # Si la vista solo se ha movido un poco, desplazar las capas anteriores
+    vista_nueva = True
+    if cache_seccion["geometria"] == geometria:
+        dx = (x_inicio - cache_seccion["vista"][0] + ancho // 2) % ancho - ancho // 2
+        dy = (y_inicio - cache_seccion["vista"][1] + alto // 2) % alto - alto // 2
+        limite = max_desplazamiento_incremental * (x_fin - x_inicio)
+        if dx == 0 and dy == 0:
+            vista_nueva = False
+        elif abs(dx) <= limite and abs(dy) <= limite:
+            desplazar_seccion_isometrica(dx, dy, x_inicio, y_inicio, ancho, alto, cursor, parametros, claves)
+            cache_seccion["fotograma"] = None
+            vista_nueva = False
+
+    if vista_nueva:
+        # Consulta en la base de datos para obtener los datos del terreno y las nubes
+        datos = obtener_datos_vista(cursor, x_inicio, y_inicio, x_fin - x_inicio, y_fin - y_inicio, ancho, alto)
+        fase = fase_proyeccion(x_inicio, y_inicio, separacion_pixeles)
+        cache_seccion.update(geometria=geometria, vista=(x_inicio, y_inicio), origen=(x_inicio, y_inicio), fase=fase, datos=datos, capas={}, claves={}, fotograma=None)
+
+    # Redibujar solo las capas cuyas dependencias han cambiado
+    capas, claves_capas = cache_seccion["capas"], cache_seccion["claves"]
+    pendientes = [nombre for nombre in capas_celdas if claves_capas.get(nombre) != claves[nombre]]
+    if pendientes:
+        datos = cache_seccion["datos"]
+        proyeccion = proyectar_datos(datos, 0, 0, cache_seccion["fase"], centro_x, centro_y, parametros)
+        nuevas = crear_capas(ancho_iso, alto_iso, pendientes)
+        dibujar_celdas(nuevas, np.ones(datos["alturas"].shape, dtype=bool), datos, proyeccion, parametros)
+        capas.update(nuevas)
+        claves_capas.update({nombre: claves[nombre] for nombre in pendientes})
+        cache_seccion["fotograma"] = None
+
+    if claves_capas.get("sprites") != claves["sprites"]:
+        capas["sprites"] = crear_capas(ancho_iso, alto_iso, ["sprites"])["sprites"]
+        dibujar_capa_sprites(capas["sprites"], npcs, cursor, x_inicio, y_inicio, x_fin - x_inicio, cache_seccion["fase"], parametros)
+        claves_capas["sprites"] = claves["sprites"]
+        cache_seccion["fotograma"] = None
+
+    # Si ninguna capa ha cambiado (por ejemplo, solo ha avanzado la hora) basta con volver a iluminar
+    if cache_seccion["fotograma"] is None:
+        cache_seccion["fotograma"] = combinar_capas(capas)
+    return iluminar_fotograma(cache_seccion["fotograma"], luz_ambiental)
+
+# Función para generar una vista previa dibujando una de cada parametros["paso"] celdas con baldosas más grandes
+def generar_vista_previa(x_inicio, y_inicio, ancho_vista, alto_vista, ancho, alto, cursor, parametros, npcs):
+    paso = parametros["paso"]
+    ancho_iso, alto_iso = ancho_vista * parametros["separacion_pixeles"], alto_vista * parametros["separacion_pixeles"]
+    centro_x, centro_y = ancho_iso // 2, alto_iso // 2
+    fase = fase_proyeccion(x_inicio, y_inicio, parametros["separacion_pixeles"])
+
+    datos = obtener_datos_vista(cursor, x_inicio, y_inicio, ancho_vista, alto_vista, ancho, alto, paso)
+    proyeccion = proyectar_datos(datos, -(-x_inicio % paso), -(-y_inicio % paso), fase, centro_x, centro_y, parametros)
+    capas = crear_capas(ancho_iso, alto_iso, capas_celdas + ("sprites",))
+    dibujar_celdas(capas, np.ones(datos["alturas"].shape, dtype=bool), datos, proyeccion, parametros)
+    dibujar_capa_sprites(capas["sprites"], npcs, cursor, x_inicio, y_inicio, ancho_vista, fase, parametros)
+    return iluminar_fotograma(combinar_capas(capas), parametros["luz_ambiental"])
+
+# Función para desplazar las capas anteriores y redibujar solo las franjas que cambian
+# Las capas cuyas dependencias también han cambiado se descartan para redibujarlas enteras
+def desplazar_seccion_isometrica(dx, dy, x_inicio, y_inicio, ancho, alto, cursor, parametros, claves):
+    datos_previos = cache_seccion["datos"]
+    capas_previas = {nombre: capa for nombre, capa in cache_seccion["capas"].items() if nombre in capas_celdas and cache_seccion["claves"].get(nombre) == claves[nombre]}
+    alto_vista, ancho_vista = datos_previos["alturas"].shape
+    ancho_iso, alto_iso = ancho_vista * parametros["separacion_pixeles"], alto_vista * parametros["separacion_pixeles"]
+    centro_x, centro_y = ancho_iso // 2, alto_iso // 2
+    separacion_pixeles = parametros["separacion_pixeles"]
+
+    # Unión de la vista anterior y la nueva, en coordenadas relativas a la vista anterior
+    union_i, union_j = min(0, dx), min(0, dy)
+    ancho_union, alto_union = ancho_vista + abs(dx), alto_vista + abs(dy)
+    union = {
+        "alturas": np.full((alto_union, ancho_union), np.nan),
+        "colores": np.zeros((alto_union, ancho_union, 3), dtype=np.uint8),
+        "nubes": np.full((alto_union, ancho_union), np.nan),
+    }
+    for clave in union:
+        union[clave][-union_j:-union_j + alto_vista, -union_i:-union_i + ancho_vista] = datos_previos[clave]
+
+    # Consultar solo las franjas recién expuestas
+    nueva_i, nueva_j = dx - union_i, dy - union_j
+    franjas = []
+    if dx > 0:
+        franjas.append((ancho_vista, dy, dx, alto_vista))
+    elif dx < 0:
+        franjas.append((dx, dy, -dx, alto_vista))
+    if dy > 0:
+        franjas.append((dx, alto_vista, ancho_vista, dy))
+    elif dy < 0:
+        franjas.append((dx, dy, ancho_vista, -dy))
+    x_previo, y_previo = cache_seccion["vista"]
+    for franja_i, franja_j, franja_ancho, franja_alto in franjas:
+        datos_franja = obtener_datos_vista(cursor, x_previo + franja_i, y_previo + franja_j, franja_ancho, franja_alto, ancho, alto)
+        for clave in union:
+            union[clave][franja_j - union_j:franja_j - union_j + franja_alto, franja_i - union_i:franja_i - union_i + franja_ancho] = datos_franja[clave]
+
+    # Desplazar la fase y las capas anteriores un número entero de píxeles
+    fase_previa = cache_seccion["fase"]
+    origen = (cache_seccion["origen"][0] + dx, cache_seccion["origen"][1] + dy)
+    fase = fase_proyeccion(origen[0], origen[1], separacion_pixeles)
+    desplazamiento = (math.floor(fase_previa[0]) - math.floor(fase[0]), math.floor(fase_previa[1]) - math.floor(fase[1]))
+    capas = crear_capas(ancho_iso, alto_iso, capas_previas)
+    for nombre, capa in capas.items():
+        capa.paste(capas_previas[nombre], desplazamiento)
+
+    # Celdas estables: están en ambas vistas y sus tres vecinos están igual en las dos
+    en_previa = np.zeros((alto_union + 1, ancho_union + 1), dtype=bool)
+    en_previa[-union_j:-union_j + alto_vista, -union_i:-union_i + ancho_vista] = True
+    en_nueva = np.zeros((alto_union + 1, ancho_union + 1), dtype=bool)
+    en_nueva[nueva_j:nueva_j + alto_vista, nueva_i:nueva_i + ancho_vista] = True
+    iguales = en_previa == en_nueva
+    estables = (en_previa & en_nueva)[:-1, :-1] & iguales[:-1, 1:] & iguales[1:, :-1] & iguales[1:, 1:]
+    cambiadas = (en_previa | en_nueva)[:-1, :-1] & ~estables
+
+    # Dibujar la huella de las celdas que cambian en una máscara de píxeles sucios
+    proyeccion = proyectar_datos(union, nueva_i, nueva_j, fase, centro_x, centro_y, parametros)
+    mascara = Image.new("L", (ancho_iso, alto_iso), 0)
+    dibujar_mascara = ImageDraw.Draw(mascara)
+
+    def marcar(puntos):
+        # PIL no dibuja el contorno si coincide con el relleno, así que van en dos llamadas
+        dibujar_mascara.polygon(puntos, fill=255)
+        dibujar_mascara.polygon(puntos, outline=255)
+
+    presentes = ~np.isnan(union["alturas"])
+    completos = vecinos_completos(presentes)
+    px = proyeccion["x"]
+    for j, i in zip(*np.nonzero(cambiadas & presentes)):
+        iso_x = px[j, i]
+        iso_y = proyeccion["terreno"][j, i]
+        marcar([(iso_x, iso_y), (iso_x + separacion_pixeles * FACTOR_ISO, iso_y + separacion_pixeles / 2), (iso_x, iso_y + separacion_pixeles), (iso_x - separacion_pixeles * FACTOR_ISO, iso_y + separacion_pixeles / 2)])
+        if completos[j, i]:
+            capas_celda = ["terreno"]
+            if union["alturas"][j, i] < parametros["nivel_agua"]:
+                capas_celda.append("agua")
+            if union["nubes"][j, i] > 0.5:
+                capas_celda.append("nube")
+            for capa in capas_celda:
+                py = proyeccion[capa]
+                marcar([(iso_x, py[j, i]), (px[j, i + 1], py[j, i + 1]), (px[j + 1, i + 1], py[j + 1, i + 1]), (px[j + 1, i], py[j + 1, i])])
+
+    # También está sucio el borde de la imagen que entra desde fuera del fotograma anterior
+    # y el marco de la imagen, donde PIL recorta los polígonos distinto según dónde caen
+    desplazamiento_x, desplazamiento_y = desplazamiento
+    marco = int(separacion_pixeles * FACTOR_ISO) + 1
+    dibujar_mascara.rectangle([0, 0, ancho_iso, alto_iso], outline=255, width=marco)
+    if desplazamiento_x > 0:
+        dibujar_mascara.rectangle([0, 0, desplazamiento_x - 1, alto_iso], fill=255)
+    elif desplazamiento_x < 0:
+        dibujar_mascara.rectangle([ancho_iso + desplazamiento_x, 0, ancho_iso, alto_iso], fill=255)
+    if desplazamiento_y > 0:
+        dibujar_mascara.rectangle([0, 0, ancho_iso, desplazamiento_y - 1], fill=255)
+    elif desplazamiento_y < 0:
+        dibujar_mascara.rectangle([0, alto_iso + desplazamiento_y, ancho_iso, alto_iso], fill=255)
+
+    # Celdas de la vista nueva cuya huella toca algún bloque sucio (tabla de sumas acumuladas por bloques)
+    bloque = 16
+    sucios = np.asarray(mascara) > 0
+    alto_bloques, ancho_bloques = -(-alto_iso // bloque), -(-ancho_iso // bloque)
+    relleno = np.zeros((alto_bloques * bloque, ancho_bloques * bloque), dtype=bool)
+    relleno[:alto_iso, :ancho_iso] = sucios
+    bloques = relleno.reshape(alto_bloques, bloque, ancho_bloques, bloque).any(axis=(1, 3))
+    suma = np.zeros((alto_bloques + 1, ancho_bloques + 1), dtype=int)
+    suma[1:, 1:] = bloques.cumsum(0).cumsum(1)
+
+    margen = int(separacion_pixeles * FACTOR_ISO) + 2
+    alturas_capa = {
+        "terreno": proyeccion["terreno"],
+        "agua": np.where(union["alturas"] < parametros["nivel_agua"], proyeccion["agua"], proyeccion["terreno"]),
+        "nube": np.where(union["nubes"] > 0.5, proyeccion["nube"], proyeccion["terreno"]),
+    }
+    esquinas = np.stack([np.roll(np.roll(alturas_capa[capa], -dj, 0), -di, 1) for capa in alturas_capa for dj in (0, 1) for di in (0, 1)])
+    x_min = np.clip((px - margen) // bloque, 0, ancho_bloques - 1)
+    x_max = np.clip((px + margen) // bloque, 0, ancho_bloques - 1)
+    y_min = np.clip((esquinas.min(axis=0) - 2) // bloque, 0, alto_bloques - 1)
+    y_max = np.clip((np.maximum(esquinas.max(axis=0), proyeccion["terreno"] + separacion_pixeles) + 2) // bloque, 0, alto_bloques - 1)
+    tocadas = (suma[y_max + 1, x_max + 1] - suma[y_min, x_max + 1] - suma[y_max + 1, x_min] + suma[y_min, x_min]) > 0
+
+    # Redibujar esas celdas en capas nuevas y copiarlas solo donde la máscara está sucia
+    datos = {clave: union[clave][nueva_j:nueva_j + alto_vista, nueva_i:nueva_i + ancho_vista] for clave in union}
+    proyeccion_nueva = {clave: proyeccion[clave][nueva_j:nueva_j + alto_vista, nueva_i:nueva_i + ancho_vista] for clave in proyeccion}
+    capas_redibujadas = crear_capas(ancho_iso, alto_iso, capas)
+    dibujar_celdas(capas_redibujadas, tocadas[nueva_j:nueva_j + alto_vista, nueva_i:nueva_i + ancho_vista], datos, proyeccion_nueva, parametros)
+    for nombre, capa in capas.items():
+        capa.paste(capas_redibujadas[nombre], (0, 0), mascara)
+
+    # Los sprites dependen de la vista, así que siempre se vuelven a dibujar
+    cache_seccion.update(vista=(x_inicio, y_inicio), origen=origen, fase=fase, datos=datos, capas=capas, claves={nombre: cache_seccion["claves"][nombre] for nombre in capas})
+
+# Establecer las dimensiones para la proyección equirectangular
+multiplicador = 1024  # Definir multiplicador base
+multiplica = 4  # Multiplicador adicional
+ancho, alto = multiplicador * multiplica * 2, multiplicador * multiplica
+escala = 5  # Definir la escala
+escala_nube = 7  # Diferente escala para las nubes
+nivel_agua = 0.5  # Nivel de agua por defecto, ajustable
+
+# Inicializar semilla aleatoria
+semilla = random.randint(0, 1000000)
+
+# Definir el tamaño de la sección para el lienzo más grande
+tamano_seccion = int(math.sqrt(0.00004 * ancho * alto)) * 2  # Aumentar el tamaño de la sección por un factor de 2
+
+# Definir los puntos de inicio para la sección en el centro del terreno
+x_inicio = (ancho - tamano_seccion) // 2
+y_inicio = (alto - tamano_seccion) // 2
+
+# Función para convertir coordenadas de terreno a coordenadas esféricas
+def terreno_a_esferico(x, y, ancho, alto):
+    lon = (x / ancho) * 2 * math.pi  # Longitud en [0, 2pi]
+    lat = (y / alto) * math.pi  # Latitud en [0, pi]
+    lat = lat - math.pi / 2  # Ajustar a rango [-pi/2, pi/2]
+    return lat, lon
+
+# Declarar la variable global `lienzo`
+global lienzo, tk_img
+
+# Cargar la hoja de sprites
+hoja_sprites = Image.open("spritesheet.png")  # Cargar imagen de sprites
+
+# Extraer los sprites individuales
+ancho_sprite = hoja_sprites.width // 2
+alto_sprite = hoja_sprites.height // 2
+
+# Diccionario para almacenar los sprites recortados
+sprites = {
+    "este": hoja_sprites.crop((0, 0, ancho_sprite, alto_sprite)),
+    "norte": hoja_sprites.crop((ancho_sprite, 0, ancho_sprite * 2, alto_sprite)),
+    "sur": hoja_sprites.crop((0, alto_sprite, ancho_sprite, alto_sprite * 2)),
+    "oeste": hoja_sprites.crop((ancho_sprite, alto_sprite, ancho_sprite * 2, alto_sprite * 2)),
+}
+
+# Variable global para la dirección del personaje
+direccion_personaje = "sur"  # Dirección por defecto
+
+# Variable global para la escala del personaje
+escala_personaje = 0.25  # Escala por defecto
+
+# Función para pegar un sprite en una capa RGBA recortándolo a los bordes de la capa
+def pegar_sprite(capa, sprite, x, y):
+    izquierda, arriba = max(0, -x), max(0, -y)
+    derecha, abajo = min(sprite.width, capa.width - x), min(sprite.height, capa.height - y)
+    if derecha > izquierda and abajo > arriba:
+        capa.alpha_composite(sprite, (x + izquierda, y + arriba), (izquierda, arriba, derecha, abajo))
+
+# Función para dibujar los NPCs y el personaje en su propia capa
+def dibujar_capa_sprites(capa, npcs, cursor, x_inicio, y_inicio, tamano_seccion, fase, parametros):
+    centro_x, centro_y = capa.width // 2, capa.height // 2
+    argumentos = (fase, centro_x, centro_y, parametros["multiplicador_altura"], parametros["separacion_pixeles"], parametros["desfase_y_pixel"])
+    escala_personaje = parametros["escala_personaje"]
+
+    for npc_data in npcs:
+        npc_id, npc_x, npc_y, npc_direction = npc_data
+        
+        # Query the height for the NPC's current position in the terrain
+        cursor.execute("SELECT altura FROM terreno WHERE x = ? AND y = ?", (npc_x, npc_y))
+        resultado_altura = cursor.fetchone()
+        altura_terreno = resultado_altura[0] if resultado_altura else 0
+        valor_normalizado = altura_terreno / 65535.0
+
+        # Calculate the isometric position with the same projection phase as the terrain
+        iso_x, iso_y = proyectar_iso(npc_x - x_inicio, npc_y - y_inicio, valor_normalizado, *argumentos)
+
+        # Get the NPC's sprite based on direction
+        sprite_npc = sprites.get(npc_direction, sprites['sur'])
+        # Scale the sprite based on the global character scale
+        sprite_escalado = sprite_npc.resize((int(ancho_sprite * escala_personaje), int(alto_sprite * escala_personaje)), Image.Resampling.LANCZOS)
+        pegar_sprite(capa, sprite_escalado, int(iso_x) - sprite_escalado.width // 2, int(iso_y) - sprite_escalado.height // 2)
+
+    # Draw the player's character in the center of the screen
+    personaje_x = x_inicio + tamano_seccion // 2
+    personaje_y = y_inicio + tamano_seccion // 2
+    
+    # Query the height for the player's current position in the terrain
+    cursor.execute("SELECT altura FROM terreno WHERE x = ? AND y = ?", (personaje_x, personaje_y))
+    resultado_altura = cursor.fetchone()
+    altura_terreno = resultado_altura[0] if resultado_altura else 0
+    valor_normalizado = altura_terreno / 65535.0
+    
+    # Calculate the correct iso_y for the player character based on terrain height and screen centering
+    iso_personaje_x, iso_personaje_y = proyectar_iso(personaje_x - x_inicio, personaje_y - y_inicio, valor_normalizado, *argumentos)
+
+    # Get the sprite of the player's character
+    sprite_personaje = sprites[parametros["direccion_personaje"]]
+    sprite_escalado = sprite_personaje.resize((int(ancho_sprite * escala_personaje), int(alto_sprite * escala_personaje)), Image.Resampling.LANCZOS)
+    
+    # Paste the player's character sprite on the canvas
+    pegar_sprite(capa, sprite_escalado, int(iso_personaje_x) - sprite_escalado.width // 2, int(iso_personaje_y) - sprite_escalado.height // 2)
+
+# Servicio de render en segundo plano: solo se atiende la petición más reciente
+servicio_render = {
+    "condicion": threading.Condition(),  # Protege la petición y el resultado y despierta al hilo
+    "generacion": 0,  # Número de la última petición
+    "peticion": None,  # Última petición pendiente: (generacion, argumentos)
+    "resultado": None,  # Último fotograma terminado y aún no mostrado: (generacion, imagen)
+    "mostrada": 0,  # Generación del fotograma que está en el lienzo
+}
+intervalo_sondeo_render = 15  # Milisegundos entre comprobaciones de fotogramas terminados
+
+# Función para pedir un fotograma; una petición nueva sustituye a la que aún no se ha empezado
+def solicitar_render(argumentos):
+    condicion = servicio_render["condicion"]
+    with condicion:
+        servicio_render["generacion"] += 1
+        servicio_render["peticion"] = (servicio_render["generacion"], argumentos)
+        condicion.notify()
+
+# Función del hilo de render: espera peticiones y deja el fotograma terminado para el hilo de Tk
+def hilo_render():
+    # SQLite no permite usar una conexión desde otro hilo, así que el hilo abre la suya
+    conexion_render = sqlite3.connect("datos_terreno.db")
+    cursor_render = conexion_render.cursor()
+    condicion = servicio_render["condicion"]
+    while True:
+        with condicion:
+            while servicio_render["peticion"] is None:
+                condicion.wait()
+            generacion, argumentos = servicio_render["peticion"]
+            servicio_render["peticion"] = None
+
+        iniciar_medicion("Actualizar lienzo (escena isométrica)")
+        try:
+            seccion = generar_seccion_isometrica(cursor=cursor_render, **argumentos)
+        except Exception as error:
+            print(f"Error al generar la sección isométrica: {error}")
+            continue
+        terminar_medicion("Actualizar lienzo (escena isométrica)")
+
+        with condicion:
+            servicio_render["resultado"] = (generacion, seccion)
+
+# Render progresivo: mientras el usuario interactúa se dibuja una vista previa y en reposo se refina
+paso_vista_previa = 4  # Se dibuja una de cada paso_vista_previa celdas en cada eje
+espera_refinado = 300  # Milisegundos sin interacción antes de dibujar con todo detalle
+refinado = {"pendiente": None, "detalle": None}  # raiz.after del refinado programado y última petición con todo detalle
+
+# Política de calidad: devuelve el paso de celdas con el que dibujar según el motivo del refresco
+# Se puede sustituir por otra función para cambiar cuándo se usa la vista previa
+# La vista previa solo se usa cuando la caché de capas tendría que redibujar la vista entera; los desplazamientos
+# pequeños y los deslizadores que solo cambian algunas capas siguen con todo detalle por la caché
+def politica_calidad(motivo, argumentos):
+    if (motivo == "interaccion" or refinado["pendiente"] is not None) and not vista_en_cache(argumentos):
+        return paso_vista_previa
+    return 1
+
+# Argumentos de la petición que cambian la geometría de la caché de capas; si cambian se redibuja la vista entera
+argumentos_geometria = ("multiplicador_altura", "desfase_y_pixel", "separacion_pixeles", "paso")
+
+# Función para saber si la caché de capas sirve la petición sin redibujar la vista entera: la geometría es la de la
+# última petición con todo detalle y la vista está en el mismo sitio o se ha desplazado lo bastante poco
+def vista_en_cache(argumentos):
+    previos = refinado["detalle"]
+    if previos is None:
+        return False
+    tamano_vista = argumentos["x_fin"] - argumentos["x_inicio"]
+    if tamano_vista != previos["x_fin"] - previos["x_inicio"] or any(argumentos[clave] != previos[clave] for clave in argumentos_geometria):
+        return False
+    dx = (argumentos["x_inicio"] - previos["x_inicio"] + ancho // 2) % ancho - ancho // 2
+    dy = (argumentos["y_inicio"] - previos["y_inicio"] + alto // 2) % alto - alto // 2
+    limite = max_desplazamiento_incremental * tamano_vista
+    return (dx == 0 and dy == 0) or (abs(dx) <= limite and abs(dy) <= limite)
+
+# Función para dibujar con todo detalle cuando la entrada lleva un rato en reposo
+def refinar_lienzo():
+    refinado["pendiente"] = None
+    actualizar_lienzo("reposo")
+
+# Function to update the canvas with the new section
+# The section is rendered in the background thread; this only queues the request
+def actualizar_lienzo(motivo="reposo"):
+    global x_inicio, y_inicio, tamano_seccion, cursor, multiplicador_altura, desfase_y_pixel, separacion_pixeles, desfase_nube, factor_sombra, transparencia_nube, brillo_nube
+    x_fin = x_inicio + tamano_seccion
+    y_fin = y_inicio + tamano_seccion
+    
+    # NPCs visible in the current section
+    cursor.execute("SELECT id, x, y, direction FROM npc WHERE x BETWEEN ? AND ? AND y BETWEEN ? AND ?", 
+                   (x_inicio, x_fin, y_inicio, y_fin))
+    npcs = cursor.fetchall()
+    
+    # Request the isometric section with a snapshot of the current parameters
+    argumentos = {
+        "x_inicio": x_inicio, "x_fin": x_fin, "y_inicio": y_inicio, "y_fin": y_fin, "ancho": ancho, "alto": alto,
+        "escala": escala, "semilla": semilla, "nivel_agua": nivel_agua, "multiplicador_altura": multiplicador_altura,
+        "desfase_y_pixel": desfase_y_pixel, "separacion_pixeles": separacion_pixeles, "desfase_nube": desfase_nube,
+        "factor_sombra": factor_sombra, "transparencia_nube": transparencia_nube, "brillo_nube": brillo_nube,
+        "npcs": npcs, "escala_personaje": escala_personaje, "direccion_personaje": direccion_personaje, "paso": 1, "luz_ambiental": luz_ambiental,
+    }
+    
+    # Coarse preview while interacting, unless the layer cache can serve the view at full detail
+    # The full-detail frame is scheduled once input is idle
+    paso_calidad = politica_calidad(motivo, argumentos)
+    if paso_calidad > 1:
+        if refinado["pendiente"] is not None:
+            raiz.after_cancel(refinado["pendiente"])
+        refinado["pendiente"] = raiz.after(espera_refinado, refinar_lienzo)
+    else:
+        refinado["detalle"] = argumentos
+    argumentos["paso"] *= paso_calidad
+    solicitar_render(argumentos)
+
+# Función para mostrar en el lienzo los fotogramas que termina el hilo de render
+def recoger_fotograma():
+    global lienzo, tk_img
+    condicion = servicio_render["condicion"]
+    with condicion:
+        resultado, servicio_render["resultado"] = servicio_render["resultado"], None
+
+    if resultado is not None and resultado[0] > servicio_render["mostrada"]:
+        generacion, seccion = resultado
+        servicio_render["mostrada"] = generacion
+
+        # Convert the section to ImageTk format
+        tk_img = ImageTk.PhotoImage(seccion)
+        
+        # Calculate offsets to center the image on the canvas
+        ancho_lienzo = lienzo.winfo_width()
+        alto_lienzo = lienzo.winfo_height()
+        desfase_x = (ancho_lienzo - seccion.width) // 2
+        desfase_y = (alto_lienzo - seccion.height) // 2
+        
+        # Clear the canvas and update it with the new section
+        lienzo.delete("all")
+        lienzo.create_image(desfase_x, desfase_y, anchor=NW, image=tk_img)
+
+    raiz.after(intervalo_sondeo_render, recoger_fotograma)
+
+
+
+# Función para dibujar la esfera
+def dibujar_esfera():
+    iniciar_medicion("Dibujar esfera 3D")
+    global cursor, lienzo_esfera, x_inicio, y_inicio, tamano_seccion, ancho, alto
+    
+    # Definir parámetros de la esfera
+    radio = 200
+    centro_x = radio + 50  # Ajustado para asegurar que la esfera esté centrada
+    centro_y = radio + 50  # Ajustado para asegurar que la esfera esté centrada
+    num_meridianos = 16
+    num_paralelos = 8
+    
+    lienzo_esfera.delete("all")
+    
+    # Calcular el centro de la sección actual en coordenadas esféricas
+    centro_x_terreno = x_inicio + tamano_seccion // 2
+    centro_y_terreno = y_inicio + tamano_seccion // 2
+    centro_lat, centro_lon = terreno_a_esferico(centro_x_terreno, centro_y_terreno, ancho, alto)
+    
+    def rotar(lat, lon, centro_lat, centro_lon):
+        # Rotar la esfera para que centro_lat, centro_lon esté en el centro de la vista
+        x = math.cos(lat) * math.cos(lon)
+        y = math.cos(lat) * math.sin(lon)
+        z = math.sin(lat)
+        
+        # Rotación alrededor del eje y (longitud)
+        xz = math.sqrt(x*x + z*z)
+        theta = math.atan2(z, x)
+        theta -= centro_lon
+        x = xz * math.cos(theta)
+        z = xz * math.sin(theta)
+        
+        # Rotación alrededor del eje x (latitud)
+        yz = math.sqrt(y*y + z*z)
+        phi = math.atan2(y, z)
+        phi -= centro_lat
+        y = yz * math.sin(phi)
+        z = yz * math.cos(phi)
+        
+        nueva_lat = math.asin(y)
+        nueva_lon = math.atan2(z, x)
+        
+        return nueva_lat, nueva_lon
+    
+    def rotacion_inicial(lat, lon):
+        # Rotar la esfera 90 grados alrededor del eje x para llevar el ecuador al centro
+        x = math.cos(lat) * math.cos(lon)
+        y = math.cos(lat) * math.sin(lon)
+        z = math.sin(lat)
+        
+        # Realizar la rotación
+        phi = math.pi / 2  # 90 grados
+        phi = 0
+        cos_phi = math.cos(phi)
+        sin_phi = math.sin(phi)
+        
+        y_nueva = y * cos_phi - z * sin_phi
+        z_nueva = y * sin_phi + z * cos_phi
+        
+        nueva_lat = math.asin(z_nueva)
+        nueva_lon = math.atan2(y_nueva, x)
+        
+        return nueva_lat, nueva_lon
+
+    def rotar_local(lat, lon, dlat, dlon):
+        # Aplicar la rotación inicial
+        lat, lon = rotacion_inicial(lat, lon)
+        
+        # Convertir lat/lon a coordenadas cartesianas
+        x = math.cos(lat) * math.cos(lon)
+        y = math.cos(lat) * math.sin(lon)
+        z = math.sin(lat)
+
+        # Rotar alrededor del eje x local (rotación de latitud)
+        phi = dlat
+        cos_phi = math.cos(phi)
+        sin_phi = math.sin(phi)
+        y_nueva = y * cos_phi - z * sin_phi
+        z_nueva = y * sin_phi + z * cos_phi
+        y = y_nueva
+        z = z_nueva
+
+        # Rotar alrededor del eje y local (rotación de longitud)
+        theta = dlon
+        cos_theta = math.cos(theta)
+        sin_theta = math.sin(theta)
+        x_nueva = x * cos_theta - z * sin_theta
+        z_nueva = x * sin_theta + z * cos_theta
+        x = x_nueva
+        z = z_nueva
+
+        # Convertir de vuelta a coordenadas esféricas
+        nueva_lat = math.asin(z)
+        nueva_lon = math.atan2(y, x)
+
+        return nueva_lat, nueva_lon
+
+    def obtener_coordenadas_pantalla(lat, lon):
+        x = radio * math.cos(lat) * math.cos(lon)
+        y = radio * math.cos(lat) * math.sin(lon)
+        z = radio * math.sin(lat)
+        pantalla_x = centro_x + x / (1 + z / (2 * radio))
+        pantalla_y = centro_y - y / (1 + z / (2 * radio))
+        return pantalla_x, pantalla_y, z
+
+    def obtener_color(lat, lon):
+        terreno_x = int((lon / (2 * math.pi)) * ancho)
+        terreno_y = int((lat + math.pi / 2) / math.pi * alto)
+        cursor.execute("SELECT color FROM terreno WHERE x = ? AND y = ?", (terreno_x, terreno_y))
+        resultado = cursor.fetchone()
+        if resultado:
+            color_str = resultado[0]
+            color = "#" + "".join(f"{int(c):02x}" for c in map(int, color_str.split(',')))
+            return color
+        return "#000000"  # Por defecto negro si no se encuentra color
+    
+    poligonos = []
+    for i in range(num_paralelos):
+        lat1 = (i / num_paralelos) * math.pi - math.pi / 2
+        lat2 = ((i + 1) / num_paralelos) * math.pi - math.pi / 2
+        for j in range(num_meridianos):
+            lon1 = (j / num_meridianos) * 2 * math.pi
+            lon2 = ((j + 1) / num_meridianos) * 2 * math.pi
+            
+            # Rotar las coordenadas
+            lat1_rot, lon1_rot = rotar_local(lat1, lon1, -y_inicio * math.pi / alto, -x_inicio * 2 * math.pi / ancho)
+            lat2_rot, lon2_rot = rotar_local(lat2, lon2, -y_inicio * math.pi / alto, -x_inicio * 2 * math.pi / ancho)
+            lat3_rot, lon3_rot = rotar_local(lat2, lon1, -y_inicio * math.pi / alto, -x_inicio * 2 * math.pi / ancho)
+            lat4_rot, lon4_rot = rotar_local(lat1, lon2, -y_inicio * math.pi / alto, -x_inicio * 2 * math.pi / ancho)
+            
+            x1, y1, z1 = obtener_coordenadas_pantalla(lat1_rot, lon1_rot)
+            x2, y2, z2 = obtener_coordenadas_pantalla(lat2_rot, lon2_rot)
+            x3, y3, z3 = obtener_coordenadas_pantalla(lat3_rot, lon3_rot)
+            x4, y4, z4 = obtener_coordenadas_pantalla(lat4_rot, lon4_rot)
+            
+            color1 = obtener_color(lat1, lon1)
+            color2 = obtener_color(lat2, lon2)
+            color3 = obtener_color(lat2, lon1)
+            color4 = obtener_color(lat1, lon2)
+            
+            # Color promedio para la cara (enfoque simple)
+            color_promedio = "#{:02x}{:02x}{:02x}".format(
+                (int(color1[1:3], 16) + int(color2[1:3], 16) + int(color3[1:3], 16) + int(color4[1:3], 16)) // 4,
+                (int(color1[3:5], 16) + int(color2[3:5], 16) + int(color3[3:5], 16) + int(color4[3:5], 16)) // 4,
+                (int(color1[5:7], 16) + int(color2[5:7], 16) + int(color3[5:7], 16) + int(color4[5:7], 16)) // 4
+            )
+            
+            # Añadir la cara como un polígono con su profundidad z promedio
+            poligonos.append(((x1, y1, z1), (x2, y2, z2), (x3, y3, z3), (x4, y4, z4), color_promedio))
+    
+    # Ordenar los polígonos por su profundidad z promedio (de atrás hacia adelante)
+    poligonos.sort(key=lambda p: (p[0][2] + p[1][2] + p[2][2] + p[3][2]) / 4, reverse=True)
+    
+    # Dibujar los polígonos
+    for pol in poligonos:
+        x1, y1, _ = pol[0]
+        x2, y2, _ = pol[1]
+        x3, y3, _ = pol[2]
+        x4, y4, _ = pol[3]
+        color_promedio = pol[4]
+        
+        # Dibujar la cara como un polígono
+        lienzo_esfera.create_polygon(
+            x1, y1, x3, y3, x2, y2, x4, y4,
+            fill=color_promedio, outline="black"
+        )
+                
+    # Dibujar el contorno de la esfera
+    lienzo_esfera.create_oval(centro_x - radio, centro_y - radio, centro_x + radio, centro_y + radio, outline="white")
+    terminar_medicion("Dibujar esfera 3D")
+
+# Función para desplazar la vista
+def desplazar(dx, dy, paso=1):
+    iniciar_medicion("Desplazar personaje")
+    
+    global x_inicio, y_inicio, ancho, alto, tamano_seccion, direccion_personaje
+
+    # Determinar la dirección del personaje basada en el movimiento
+    if dx > 0:
+        direccion_personaje = "este"
+    elif dx < 0:
+        direccion_personaje = "oeste"
+    elif dy > 0:
+        direccion_personaje = "sur"
+    elif dy < 0:
+        direccion_personaje = "norte"
+
+    # Mover las posiciones de inicio por el tamaño del paso
+    x_inicio = (x_inicio + dx * paso) % ancho
+    y_inicio = (y_inicio + dy * paso) % alto
+    
+    iniciar_medicion("Actualizar lienzo")
+    actualizar_lienzo("interaccion")  # Actualizar el lienzo
+    terminar_medicion("Actualizar lienzo")
+
+    iniciar_medicion("Dibujar esfera")
+    dibujar_esfera()  # Redibujar la esfera
+    terminar_medicion("Dibujar esfera")
+
+    iniciar_medicion("Actualizar cruceta")
+    actualizar_cruceta()  # Actualizar la cruceta
+    terminar_medicion("Actualizar cruceta")
+
+    terminar_medicion("Desplazar personaje")
+    
+    # Mostrar estadísticas solo para el refresco
+    mostrar_estadisticas_refresco()
+
+# Función para inicializar la base de datos
+def iniciar_bd():
+    conexion = sqlite3.connect("datos_terreno.db")
+    cursor = conexion.cursor()
+    
+    # Create the terrain table if it doesn't exist
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS terreno (
+        x INTEGER, 
+        y INTEGER, 
+        color TEXT, 
+        altura INTEGER, 
+        PRIMARY KEY (x, y)
+    )""")
+    
+    # Create the clouds table if it doesn't exist
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS nubes (
+        x INTEGER, 
+        y INTEGER, 
+        color TEXT, 
+        altura INTEGER, 
+        PRIMARY KEY (x, y)
+    )""")
+    
+    # Create indexes on the x and y columns to optimize queries
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_terreno_xy ON terreno (x, y)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_nubes_xy ON nubes (x, y)")
+    
+    return conexion, cursor
+
+# Función para actualizar el multiplicador de altura
+def actualizar_multiplicador_altura(val):
+    global multiplicador_altura
+    multiplicador_altura = int(float(val))
+    etiqueta_valor_multiplicador_altura.config(text=f"{multiplicador_altura}")
+    actualizar_lienzo("interaccion")
+
+# Función para actualizar el desfase en píxeles en Y
+def actualizar_desfase_y_pixel(val):
+    global desfase_y_pixel
+    desfase_y_pixel = int(float(val))
+    etiqueta_valor_desfase_y_pixel.config(text=f"{desfase_y_pixel}")
+    actualizar_lienzo("interaccion")
+
+# Función para actualizar la separación de píxeles
+def actualizar_separacion_pixeles(val):
+    global separacion_pixeles, lienzo  # Declarar lienzo como global
+    separacion_pixeles = int(float(val))
+    etiqueta_valor_separacion_pixeles.config(text=f"{separacion_pixeles}")
+    lienzo.config(width=tamano_seccion * separacion_pixeles, height=tamano_seccion * separacion_pixeles)
+    actualizar_lienzo("interaccion")
+
+# Función para actualizar el desfase de las nubes
+def actualizar_desfase_nube(val):
+    global desfase_nube
+    desfase_nube = int(float(val))
+    etiqueta_valor_desfase_nube.config(text=f"{desfase_nube}")
+    actualizar_lienzo("interaccion")
+
+# Función para actualizar el factor de sombra
+def actualizar_factor_sombra(val):
+    global factor_sombra
+    factor_sombra = float(val)
+    etiqueta_valor_factor_sombra.config(text=f"{factor_sombra:.2f}")
+    actualizar_lienzo("interaccion")
+
+# Función para actualizar el multiplicador de transparencia de las nubes
+def actualizar_transparencia_nube(val):
+    global transparencia_nube
+    transparencia_nube = float(val)
+    etiqueta_valor_transparencia_nube.config(text=f"{transparencia_nube:.2f}")
+    actualizar_lienzo("interaccion")
+
+# Función para actualizar el brillo de las nubes
+def actualizar_brillo_nube(val):
+    global brillo_nube
+    brillo_nube = int(float(val))
+    etiqueta_valor_brillo_nube.config(text=f"{brillo_nube}")
+    actualizar_lienzo("interaccion")
+
+# Función para actualizar la velocidad del tiempo
+def actualizar_velocidad_tiempo(val):
+    global velocidad_tiempo
+    velocidad_tiempo = float(val)
+    etiqueta_valor_velocidad_tiempo.config(text=f"{velocidad_tiempo:.1f}")
+
+# Función para actualizar la escala del personaje
+def actualizar_escala_personaje(val):
+    global escala_personaje
+    escala_personaje = float(val)
+    etiqueta_valor_escala_personaje.config(text=f"{escala_personaje:.2f}")
+    actualizar_lienzo("interaccion")
+
+# Función para dibujar el mapa equirectangular
+def dibujar_mapa_equirectangular():
+    iniciar_medicion("Dibujar mapa equirectangular")
+    global mapa_eq, img_eq, x_inicio, y_inicio, tamano_seccion, ancho, alto, cursor
+    
+    # Ajustar al tamaño real de la imagen
+    ancho_eq, alto_eq = ancho // 16, alto // 16
+    mapa_eq = Image.new("RGB", (ancho_eq, alto_eq))
+    dibujar = ImageDraw.Draw(mapa_eq)
+    
+    for x in range(ancho_eq):
+        for y in range(alto_eq):
+            terreno_x = int((x / ancho_eq) * ancho)
+            terreno_y = int((y / alto_eq) * alto)
+            cursor.execute("SELECT color FROM terreno WHERE x = ? AND y = ?", (terreno_x, terreno_y))
+            resultado = cursor.fetchone()
+            if resultado:
+                color_str = resultado[0]
+                color = tuple(map(int, color_str.split(',')))
+                dibujar.point((x, y), fill=color)
+    
+    # Convertir a formato ImageTk
+    img_eq = ImageTk.PhotoImage(mapa_eq)
+    
+    # Actualizar la etiqueta con el nuevo mapa
+    etiqueta_mapa_eq.config(image=img_eq)
+    etiqueta_mapa_eq.image = img_eq
+    
+    # Dibujar la cruceta inicial
+    actualizar_cruceta()
+    terminar_medicion("Dibujar mapa equirectangular")
+
+# Función para actualizar la cruceta en el mapa equirectangular
+def actualizar_cruceta():
+    global img_cruceta, x_inicio, y_inicio, tamano_seccion, ancho, alto, mapa_eq
+    
+    ancho_eq, alto_eq = mapa_eq.size
+    
+    # Crear una imagen de superposición para la cruceta
+    img_cruceta = mapa_eq.copy()
+    dibujar = ImageDraw.Draw(img_cruceta)
+    
+    # Calcular la posición de la cruceta
+    eq_x = int((x_inicio + tamano_seccion // 2) * ancho_eq / ancho)
+    eq_y = int((y_inicio + tamano_seccion // 2) * alto_eq / alto)
+    
+    # Dibujar la cruceta
+    dibujar.line([(eq_x - 25, eq_y), (eq_x + 25, eq_y)], fill="red")
+    dibujar.line([(eq_x, eq_y - 25), (eq_x, eq_y + 25)], fill="red")
+    
+    # Convertir a formato ImageTk
+    img_cruceta_tk = ImageTk.PhotoImage(img_cruceta)
+    
+    # Actualizar la etiqueta con la superposición de la cruceta
+    etiqueta_mapa_eq.config(image=img_cruceta_tk)
+    etiqueta_mapa_eq.image = img_cruceta_tk
+
+# Función para manejar clics en el mapa equirectangular
+def en_clic_mapa_eq(evento):
+    global x_inicio, y_inicio, ancho, alto, etiqueta_mapa_eq
+    
+    # Calcular las coordenadas del terreno correspondientes
+    ancho_eq, alto_eq = mapa_eq.size
+    clic_x = evento.x
+    clic_y = evento.y
+    x_inicio = int((clic_x / ancho_eq) * ancho - tamano_seccion // 2) % ancho
+    y_inicio = int((clic_y / alto_eq) * alto - tamano_seccion // 2) % alto
+    
+    # Actualizar todo
+    actualizar_lienzo("interaccion")
+    dibujar_esfera()
+    actualizar_cruceta()
+
+# Inicializar la base de datos
+iniciar_medicion("Arranque del programa")
+iniciar_medicion("Carga de la base de datos")
+conexion, cursor = iniciar_bd()
+terminar_medicion("Carga de la base de datos")
+
+# Pre-calcular los datos del terreno si no se ha hecho
+if cursor.execute("SELECT COUNT(*) FROM terreno").fetchone()[0] == 0:
+    iniciar_medicion("Cálculo de datos del terreno")
+    print("Calculando datos del terreno. Esto puede tardar un rato...")
+    for x in range(ancho):
+        for y in range(alto):
+            # Generar valor de ruido Perlin para las coordenadas esféricas
+            lon = (x / ancho) * 2 * math.pi  # Longitud en [0, 2pi]
+            lat = (y / alto) * math.pi  # Latitud en [0, pi]
+            lat = lat - math.pi / 2  # Ajustar a rango [-pi/2, pi/2]
+            
+            nx = math.cos(lat) * math.cos(lon)
+            ny = math.cos(lat) * math.sin(lon)
+            nz = math.sin(lat)
+            valor_perlin = noise.pnoise3(nx * escala, ny * escala, nz * escala, octaves=16, persistence=0.5, lacunarity=2.0)
+            
+            valor_normalizado = (valor_perlin + 1) / 2
+            abs_lat = abs(lat)
+            if abs_lat < math.pi / 4:
+                umbral_costa = interpolar_valor(0.45, 0.425, abs_lat / (math.pi / 4))
+            else:
+                umbral_costa = 0.425
+            
+            umbral_agua = nivel_agua
+            umbral_costa = interpolar_valor(umbral_agua + 0.05, umbral_costa, abs_lat / (math.pi / 2))
+            
+            if valor_normalizado < umbral_agua:
+                color = interpolar_color((0, 0, 128), (200, 200, 255), valor_normalizado / umbral_agua)
+            elif valor_normalizado < umbral_costa:
+                color = interpolar_color((250, 240, 190), (244, 164, 96), (valor_normalizado - umbral_agua) / (umbral_costa - umbral_agua))
+            elif valor_normalizado < 0.7:
+                color_base = interpolar_color((244, 164, 96), (34, 139, 34), abs_lat / (math.pi / 2))
+                color = interpolar_color(color_base, (107, 142, 35), (valor_normalizado - umbral_costa) / (0.7 - umbral_costa))
+            else:
+                color_base = interpolar_color((139, 137, 137), (34, 139, 34), abs_lat / (math.pi / 2))
+                color = interpolar_color((200,200,200), (255, 255, 255), (valor_normalizado - 0.7) / (1.0 - 0.7))
+            
+            if valor_normalizado >= umbral_agua:
+                factor_ruido = noise.pnoise3(x / 100.0, y / 100.0, semilla)
+                factor_ruido = (factor_ruido + 1) / 2
+                if abs_lat > 2 * math.pi / 5:
+                    color = (255, 250, 250)
+                elif abs_lat > math.pi / 4:
+                    factor_nieve = ((abs_lat - math.pi / 4) / (math.pi / 20)) * factor_ruido
+                    color = interpolar_color(color, (255, 255, 255), factor_nieve)
+            
+            color_str = ','.join(map(str, color))
+            cursor.execute("INSERT INTO terreno (x, y, color, altura) VALUES (?, ?, ?, ?)", (x, y, color_str, int(valor_normalizado * 65535)))
+    conexion.commit()
+    terminar_medicion("Cálculo de datos del terreno")
+    print("Cálculo de datos del terreno completado.")
+
+# Pre-calcular los datos de las nubes si no se ha hecho
+if cursor.execute("SELECT COUNT(*) FROM nubes").fetchone()[0] == 0:
+    iniciar_medicion("Cálculo de datos de las nubes")
+    print("Calculando datos de las nubes. Esto puede tardar un rato...")
+    for x in range(ancho):
+        for y in range(alto):
+            # Generar valor de ruido Perlin para la capa de nubes
+            lon = (x / ancho) * 2 * math.pi  # Longitud en [0, 2pi]
+            lat = (y / alto) * math.pi  # Latitud en [0, pi]
+            lat = lat - math.pi / 2  # Ajustar a rango [-pi/2, pi/2]
+            
+            nx = math.cos(lat) * math.cos(lon)
+            ny = math.cos(lat) * math.sin(lon)
+            nz = math.sin(lat)
+            valor_perlin = noise.pnoise3(nx * escala_nube, ny * escala_nube, nz * escala_nube, octaves=8, persistence=0.5, lacunarity=2.0)
+            
+            valor_normalizado = (valor_perlin + 1) / 2
+            color = interpolar_color((255, 255, 255), (200, 200, 200), valor_normalizado)
+            
+            color_str = ','.join(map(str, color))
+            cursor.execute("INSERT INTO nubes (x, y, color, altura) VALUES (?, ?, ?, ?)", (x, y, color_str, int(valor_normalizado * 65535)))
+    conexion.commit()
+    terminar_medicion("Cálculo de datos de las nubes")
+    print("Cálculo de datos de las nubes completado.")
+
+# Inicializar multiplicador de altura, desfase de píxeles en Y, desfase de nubes, factor de sombra, y brillo de las nubes
+multiplicador_altura = 150
+desfase_y_pixel = 1000
+desfase_nube = 16  # Desfase de nube por defecto
+factor_sombra = 0.3  # Factor de oscurecimiento de sombra por defecto
+transparencia_nube = 1.0  # Transparencia de nube por defecto
+brillo_nube = 154  # Brillo de nube por defecto
+
+# Factor de separación de píxeles para la proyección isométrica
+separacion_pixeles = 8
+
+# Crear la ventana ttkbootstrap
+raiz = ttk.Window(themename="darkly")
+raiz.title("Planeta 1")
+
+# Crear la barra de herramientas superior para controles (deslizadores y botones)
+barra_herramientas = ttk.Frame(raiz)
+barra_herramientas.grid(row=0, column=0, columnspan=2, padx=10, pady=10, sticky="ew")
+
+# Crear un deslizador para ajustar el multiplicador de altura
+etiqueta_multiplicador_altura = ttk.Label(barra_herramientas, text="Multiplicador de altura")
+etiqueta_multiplicador_altura.grid(row=0, column=0, padx=5)
+deslizador_multiplicador_altura = ttk.Scale(barra_herramientas, from_=100, to=2000, orient=HORIZONTAL, command=actualizar_multiplicador_altura)
+deslizador_multiplicador_altura.set(multiplicador_altura)
+deslizador_multiplicador_altura.grid(row=1, column=0, padx=5)
+etiqueta_valor_multiplicador_altura = ttk.Label(barra_herramientas, text=f"{multiplicador_altura}")
+etiqueta_valor_multiplicador_altura.grid(row=1, column=1, padx=5)
+
+# Crear un deslizador para ajustar el desfase en píxeles en Y
+etiqueta_desfase_y_pixel = ttk.Label(barra_herramientas, text="Desfase del terreno")
+etiqueta_desfase_y_pixel.grid(row=0, column=2, padx=5)
+deslizador_desfase_y_pixel = ttk.Scale(barra_herramientas, from_=-tamano_seccion//2-200, to=tamano_seccion//2+5500, orient=HORIZONTAL, command=actualizar_desfase_y_pixel)
+deslizador_desfase_y_pixel.set(desfase_y_pixel)
+deslizador_desfase_y_pixel.grid(row=1, column=2, padx=5)
+etiqueta_valor_desfase_y_pixel = ttk.Label(barra_herramientas, text=f"{desfase_y_pixel}")
+etiqueta_valor_desfase_y_pixel.grid(row=1, column=3, padx=5)
+
+# Crear un deslizador para ajustar la separación de píxeles
+etiqueta_separacion_pixeles = ttk.Label(barra_herramientas, text="Separación de píxeles")
+etiqueta_separacion_pixeles.grid(row=0, column=4, padx=5)
+deslizador_separacion_pixeles = ttk.Scale(barra_herramientas, from_=1, to=10, orient=HORIZONTAL, command=actualizar_separacion_pixeles)
+deslizador_separacion_pixeles.set(separacion_pixeles)
+deslizador_separacion_pixeles.grid(row=1, column=4, padx=5)
+etiqueta_valor_separacion_pixeles = ttk.Label(barra_herramientas, text=f"{separacion_pixeles}")
+etiqueta_valor_separacion_pixeles.grid(row=1, column=5, padx=5)
+
+# Crear un deslizador para ajustar el desfase de las nubes
+etiqueta_desfase_nube = ttk.Label(barra_herramientas, text="Separación de las nubes")
+etiqueta_desfase_nube.grid(row=0, column=6, padx=5)
+deslizador_desfase_nube = ttk.Scale(barra_herramientas, from_=5, to=500, orient=HORIZONTAL, command=actualizar_desfase_nube)
+deslizador_desfase_nube.set(desfase_nube)
+deslizador_desfase_nube.grid(row=1, column=6, padx=5)
+etiqueta_valor_desfase_nube = ttk.Label(barra_herramientas, text=f"{desfase_nube}")
+etiqueta_valor_desfase_nube.grid(row=1, column=7, padx=5)
+
+# Crear un deslizador para ajustar el factor de sombra
+etiqueta_factor_sombra = ttk.Label(barra_herramientas, text="Factor de sombra")
+etiqueta_factor_sombra.grid(row=0, column=8, padx=5)
+deslizador_factor_sombra = ttk.Scale(barra_herramientas, from_=0.0, to=1.0, orient=HORIZONTAL, command=actualizar_factor_sombra)
+deslizador_factor_sombra.set(factor_sombra)
+deslizador_factor_sombra.grid(row=1, column=8, padx=5)
+etiqueta_valor_factor_sombra = ttk.Label(barra_herramientas, text=f"{factor_sombra:.2f}")
+etiqueta_valor_factor_sombra.grid(row=1, column=9, padx=5)
+
+# Crear un deslizador para ajustar la transparencia de las nubes
+etiqueta_transparencia_nube = ttk.Label(barra_herramientas, text="Transparencia de las nubes")
+etiqueta_transparencia_nube.grid(row=0, column=10, padx=5)
+deslizador_transparencia_nube = ttk.Scale(barra_herramientas, from_=0.1, to=2.0, orient=HORIZONTAL, command=actualizar_transparencia_nube)
+deslizador_transparencia_nube.set(transparencia_nube)
+deslizador_transparencia_nube.grid(row=1, column=10, padx=5)
+etiqueta_valor_transparencia_nube = ttk.Label(barra_herramientas, text=f"{transparencia_nube:.2f}")
+etiqueta_valor_transparencia_nube.grid(row=1, column=11, padx=5)
+
+# Crear un deslizador para ajustar el brillo de las nubes
+etiqueta_brillo_nube = ttk.Label(barra_herramientas, text="Brillo de las nubes")
+etiqueta_brillo_nube.grid(row=0, column=12, padx=5)
+deslizador_brillo_nube = ttk.Scale(barra_herramientas, from_=-255, to=255, orient=HORIZONTAL, command=actualizar_brillo_nube)
+deslizador_brillo_nube.set(brillo_nube)
+deslizador_brillo_nube.grid(row=1, column=12, padx=5)
+etiqueta_valor_brillo_nube = ttk.Label(barra_herramientas, text=f"{brillo_nube}")
+etiqueta_valor_brillo_nube.grid(row=1, column=13, padx=5)
+
+# Crear un deslizador para ajustar la velocidad del tiempo
+etiqueta_velocidad_tiempo = ttk.Label(barra_herramientas, text="Velocidad del tiempo")
+etiqueta_velocidad_tiempo.grid(row=0, column=14, padx=5)
+deslizador_velocidad_tiempo = ttk.Scale(barra_herramientas, from_=0.1, to=10.0, orient=HORIZONTAL, command=actualizar_velocidad_tiempo)
+deslizador_velocidad_tiempo.set(velocidad_tiempo)
+deslizador_velocidad_tiempo.grid(row=1, column=14, padx=5)
+etiqueta_valor_velocidad_tiempo = ttk.Label(barra_herramientas, text=f"{velocidad_tiempo:.1f}")
+etiqueta_valor_velocidad_tiempo.grid(row=1, column=15, padx=5)
+
+# Crear un deslizador para ajustar la escala del personaje
+etiqueta_escala_personaje = ttk.Label(barra_herramientas, text="Escala del personaje")
+etiqueta_escala_personaje.grid(row=0, column=16, padx=5)
+deslizador_escala_personaje = ttk.Scale(barra_herramientas, from_=0.1, to=2.0, orient=HORIZONTAL, command=actualizar_escala_personaje)
+deslizador_escala_personaje.set(escala_personaje)
+deslizador_escala_personaje.grid(row=1, column=16, padx=5)
+etiqueta_valor_escala_personaje = ttk.Label(barra_herramientas, text=f"{escala_personaje:.2f}")
+etiqueta_valor_escala_personaje.grid(row=1, column=17, padx=5)
+
+# Crear un gran lienzo para la vista isométrica, ocupando la mitad derecha de la pantalla
+lienzo = ttk.Canvas(raiz, width=960, height=1080)
+lienzo.grid(row=1, column=1, padx=0, pady=0, sticky="nw")
+
+# Crear un marco para las vistas del lado izquierdo
+marco_izquierdo = ttk.Frame(raiz)
+marco_izquierdo.grid(row=1, column=0, padx=0, pady=10, sticky="nsew")
+
+# Crear un lienzo más pequeño para la esfera 3D
+lienzo_esfera = ttk.Canvas(marco_izquierdo, width=480, height=480, background="black")
+lienzo_esfera.grid(row=0, column=0, padx=10, pady=10)
+
+# Crear una etiqueta para el mapa equirectangular
+etiqueta_mapa_eq = ttk.Label(marco_izquierdo)
+etiqueta_mapa_eq.grid(row=1, column=0, padx=10, pady=10)
+
+# Vincular el evento de clic al mapa equirectangular
+etiqueta_mapa_eq.bind("<Button-1>", en_clic_mapa_eq)
+
+# Crear botones para controlar el desplazamiento
+marco_btn = ttk.Frame(raiz)
+btn_arriba = ttk.Button(marco_btn, text="↑", command=lambda: desplazar(0, -tamano_seccion // 10))
+btn_abajo = ttk.Button(marco_btn, text="↓", command=lambda: desplazar(0, tamano_seccion // 10))
+btn_izquierda = ttk.Button(marco_btn, text="←", command=lambda: desplazar(-tamano_seccion // 10, 0))
+btn_derecha = ttk.Button(marco_btn, text="→", command=lambda: desplazar(tamano_seccion // 10, 0))
+
+btn_arriba.grid(row=0, column=1, padx=5, pady=5)
+btn_abajo.grid(row=2, column=1, padx=5, pady=5)
+btn_izquierda.grid(row=1, column=0, padx=5, pady=5)
+btn_derecha.grid(row=1, column=2, padx=5, pady=5)
+marco_btn.grid(row=2, column=1, pady=10)
+
+# Vincular teclas de flecha para desplazamiento, con Shift para movimiento más rápido
+def presionar_tecla(evento):
+    paso = 5 if evento.state & 0x0001 else 1  # Verificar modificador Shift, usando bitmask para la tecla Shift
+    if evento.keysym == 'Up':
+        desplazar(0, -1, paso)
+    elif evento.keysym == 'Down':
+        desplazar(0, 1, paso)
+    elif evento.keysym == 'Left':
+        desplazar(-1, 0, paso)
+    elif evento.keysym == 'Right':
+        desplazar(1, 0, paso)
+
+raiz.bind('<Up>', presionar_tecla)
+raiz.bind('<Down>', presionar_tecla)
+raiz.bind('<Left>', presionar_tecla)
+raiz.bind('<Right>', presionar_tecla)
+
+# Función para actualizar los NPCs desde la base de datos
+def actualizar_npcs():
+    iniciar_medicion("Actualizar NPCs y redibujar")
+    global lienzo, tk_img, etiqueta_mapa_eq, img_eq
+    
+    # No mover los NPCs, solo cargarlos desde la base de datos
+    cursor.execute("SELECT id, x, y, direction FROM npc")
+    npcs = cursor.fetchall()
+    
+    # Redibujar la vista isométrica con NPCs
+    actualizar_lienzo()
+    
+    # Redibujar el mapa equirectangular con las posiciones de los NPCs
+    ancho_eq, alto_eq = mapa_eq.size
+    dibujar = ImageDraw.Draw(mapa_eq)
+    for npc_data in npcs:
+        npc_id, npc_x, npc_y, npc_direction = npc_data
+        eq_x = int((npc_x / ancho) * ancho_eq)
+        eq_y = int((npc_y / alto) * alto_eq)
+        dibujar.line([(eq_x - 25, eq_y), (eq_x + 25, eq_y)], fill="red")
+        dibujar.line([(eq_x, eq_y - 25), (eq_x, eq_y + 25)], fill="red")
+    
+    # Convertir el mapa actualizado a formato ImageTk y actualizar la etiqueta
+    img_eq = ImageTk.PhotoImage(mapa_eq)
+    etiqueta_mapa_eq.config(image=img_eq)
+    etiqueta_mapa_eq.image = img_eq
+
+    # Programar la próxima actualización
+    raiz.after(1000, actualizar_npcs)
+    terminar_medicion("Actualizar NPCs y redibujar")
+
+# Iniciar el hilo de render y la recogida de fotogramas
+threading.Thread(target=hilo_render, daemon=True).start()
+raiz.after(intervalo_sondeo_render, recoger_fotograma)
+
+# Iniciar el ciclo principal de ttkbootstrap
+raiz.after(100, actualizar_lienzo)
+raiz.after(100, dibujar_esfera)
+raiz.after(100, dibujar_mapa_equirectangular)
+raiz.after(100, actualizar_hora)
+raiz.after(1000, actualizar_npcs)  # Iniciar actualizaciones de NPCs (sin moverlos)
+terminar_medicion("Arranque del programa")
+mostrar_estadisticas_refresco()
+raiz.mainloop()
+
+# Cerrar la conexión a la base de datos cuando se cierra la aplicación
+conexion.close()
@@ -0,0 +1,176 @@
+from flask import Flask, send_file, request, jsonify
+from PIL import Image
+import sqlite3
+import io
+import math
+import numpy as np
+
+app = Flask(__name__)
+
+# Path to your SQLite database
+DATABASE_PATH = "datos_terreno.db"
+
+# Function to get terrain dimensions (max x and max y)
+def get_terrain_dimensions():
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT MAX(x), MAX(y) FROM terreno")
+    max_x, max_y = cursor.fetchone()
+    
+    conn.close()
+    return max_x + 1, max_y + 1  # Add 1 because coordinates are zero-indexed
+
+# Function to get terrain data from the database
+def get_terrain_data():
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT x, y, color, altura FROM terreno")
+    terrain_data = cursor.fetchall()
+    
+    conn.close()
+    return terrain_data
+
+# Biome palette: the color rules of the terrain precompute as a lookup table indexed by quantised height and latitude
+# Changing the water level only rebuilds the table; the stored colors are not used
+HEIGHT_LEVELS = 1024
+LATITUDE_LEVELS = 64
+palette_cache = {}  # water_level -> table (height, latitude, RGB)
+MAX_PALETTES = 8
+MIN_WATER_LEVEL, MAX_WATER_LEVEL = 0.3, 0.7  # Same range as the viewer's slider
+
+# Build (or reuse) the palette for a water level
+# Snow uses the mean noise instead of the per-cell noise of the precompute
+def biome_palette(water_level):
+    if water_level not in palette_cache:
+        height = ((np.arange(HEIGHT_LEVELS) + 0.5) / HEIGHT_LEVELS)[:, None, None]
+        abs_lat = ((np.arange(LATITUDE_LEVELS) + 0.5) / LATITUDE_LEVELS * math.pi / 2)[None, :, None]
+
+        def interpolate(color1, color2, factor):
+            return np.asarray(color1) + (np.asarray(color2) - np.asarray(color1)) * factor
+
+        coast = np.where(abs_lat < math.pi / 4, 0.45 + (0.425 - 0.45) * abs_lat / (math.pi / 4), 0.425)
+        coast = water_level + 0.05 + (coast - water_level - 0.05) * abs_lat / (math.pi / 2)
+        water_color = interpolate((0, 0, 128), (200, 200, 255), height / water_level)
+        coast_color = interpolate((250, 240, 190), (244, 164, 96), (height - water_level) / (coast - water_level))
+        lowland_color = interpolate(interpolate((244, 164, 96), (34, 139, 34), abs_lat / (math.pi / 2)), (107, 142, 35), (height - coast) / (0.7 - coast))
+        mountain_color = interpolate((200, 200, 200), (255, 255, 255), (height - 0.7) / (1.0 - 0.7))
+        table = np.where(height < water_level, water_color, np.where(height < coast, coast_color, np.where(height < 0.7, lowland_color, mountain_color)))
+
+        # Snow on land near the poles
+        snow_factor = np.clip((abs_lat - math.pi / 4) / (math.pi / 20) * 0.5, 0, 1)
+        snow_color = np.where(abs_lat > 2 * math.pi / 5, np.array([255, 250, 250]), interpolate(table, (255, 255, 255), snow_factor))
+        table = np.where((height >= water_level) & (abs_lat > math.pi / 4), snow_color, table)
+        if len(palette_cache) >= MAX_PALETTES:
+            palette_cache.pop(next(iter(palette_cache)))
+        palette_cache[water_level] = np.clip(table, 0, 255).astype(np.uint8)
+    return palette_cache[water_level]
+
+# Generate a terrain color map by applying the biome palette to the heights
+def generate_terrain_color_map(scale=1, water_level=0.5):
+    terrain_data = np.array(get_terrain_data_heights(), dtype=np.int64).reshape(-1, 3)
+
+    # Automatically detect terrain dimensions
+    terrain_width, terrain_height = get_terrain_dimensions()
+    
+    # Adjust dimensions based on scale
+    scaled_width = int(terrain_width / scale)
+    scaled_height = int(terrain_height / scale)
+
+    # Quantised height and latitude of every cell, then one palette lookup for all of them
+    x, y, altura = terrain_data.T
+    height_index = np.clip(altura * HEIGHT_LEVELS // 65536, 0, HEIGHT_LEVELS - 1)
+    abs_lat = np.abs(y / terrain_height * math.pi - math.pi / 2)
+    latitude_index = np.clip((abs_lat / (math.pi / 2) * LATITUDE_LEVELS).astype(int), 0, LATITUDE_LEVELS - 1)
+    colors = biome_palette(water_level)[height_index, latitude_index]
+
+    # Initialize a numpy array for the image
+    color_array = np.zeros((scaled_height, scaled_width, 3), dtype=np.uint8)
+    scaled_x, scaled_y = (x / scale).astype(int), (y / scale).astype(int)
+    inside = (scaled_x < scaled_width) & (scaled_y < scaled_height)
+    color_array[scaled_y[inside], scaled_x[inside]] = colors[inside]
+    
+    # Convert numpy array to PIL Image
+    color_image = Image.fromarray(color_array, 'RGB')
+    
+    return color_image
+
+# Function to get only the coordinates and heights from the database
+def get_terrain_data_heights():
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT x, y, altura FROM terreno")
+    terrain_data = cursor.fetchall()
+    
+    conn.close()
+    return terrain_data
+
+# Generate a terrain height map with numpy for better performance
+def generate_terrain_height_map(scale=1):
+    terrain_data = get_terrain_data()
+
+    # Automatically detect terrain dimensions
+    terrain_width, terrain_height = get_terrain_dimensions()
+    
+    # Adjust dimensions based on scale
+    scaled_width = int(terrain_width / scale)
+    scaled_height = int(terrain_height / scale)
+
+    # Initialize a numpy array for the image
+    height_array = np.zeros((scaled_height, scaled_width), dtype=np.uint8)
+
+    for x, y, _, altura in terrain_data:
+        scaled_x = int(x / scale)
+        scaled_y = int(y / scale)
+        if 0 <= scaled_x < scaled_width and 0 <= scaled_y < scaled_height:
+            # Normalize height to grayscale (0-255)
+            grayscale_value = int((altura / 65535.0) * 255)
+            height_array[scaled_y, scaled_x] = grayscale_value
+    
+    # Convert numpy array to PIL Image
+    height_image = Image.fromarray(height_array, 'L')
+    
+    return height_image
+
+@app.route('/terrain/color_map.jpg')
+def terrain_color_map():
+    # Get the scale parameter from the request query string (default to 1)
+    scale = float(request.args.get('scale', 1))
+    # Clamp and round the water level like the viewer's slider, so there are few distinct palettes
+    try:
+        water_level = float(request.args.get('water_level', 0.5))
+    except ValueError:
+        return jsonify({"error": "water_level must be a finite number"}), 400
+    if not math.isfinite(water_level):
+        return jsonify({"error": "water_level must be a finite number"}), 400
+    water_level = round(min(max(water_level, MIN_WATER_LEVEL), MAX_WATER_LEVEL), 3)
+    color_image = generate_terrain_color_map(scale, water_level)
+
+    # Save the image to a BytesIO object to serve it directly
+    img_io = io.BytesIO()
+    color_image.save(img_io, 'JPEG')
+    img_io.seek(0)
+    
+    return send_file(img_io, mimetype='image/jpeg')
+
+@app.route('/terrain/height_map.jpg')
+def terrain_height_map():
+    # Get the scale parameter from the request query string (default to 1)
+    scale = float(request.args.get('scale', 1))
+    height_image = generate_terrain_height_map(scale)
+
+    # Save the image to a BytesIO object to serve it directly
+    img_io = io.BytesIO()
+    height_image.save(img_io, 'JPEG')
+    img_io.seek(0)
+    
+    return send_file(img_io, mimetype='image/jpeg')
+
+@app.route('/')
+def index():
+    return jsonify({"message": "Welcome to the Terrain Data API!"})
+
+if __name__ == '__main__':
+    app.run(debug=True)